@@ -0,0 +1,116 @@
+'''
+This module takes Redis writes that the user never waits for (interactions and semantic cache entries) off the request path.
+Writes are put on a bounded queue and a background thread batches them into pipelined Redis writes every few
+milliseconds (or every batch_size items). If the queue is full we fall back to writing synchronously.
+
+Interactions that are queued but not yet written are kept in a (worker local) pending map so that /feedback
+can find an interaction that was created a few milliseconds ago.
+'''
+
+import atexit
+import itertools
+import logging
+import queue
+import threading
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class InteractionWriter:
+
+    def __init__(self, conn: redis.Redis, batch_size=50, flush_interval_ms=5, queue_size=10000):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = {}  # key -> (mapping, seq) for writes that are queued but not yet in redis
+        self._pending_lock = threading.Lock()
+        self._seq = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="interaction-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, key: str, mapping: dict, expiration=None, remember=True):
+        '''
+        queues an HSET (and EXPIRE if expiration is given) of mapping on key.
+        remember=True makes the (merged) mapping readable through get_pending until it is written.
+        '''
+        item = (key, mapping, expiration, next(self._seq))
+        if remember:
+            with self._pending_lock:
+                existing = self._pending.get(key)
+                merged = {**existing[0], **mapping} if existing else dict(mapping)
+                self._pending[key] = (merged, item[3])
+
+        if self._closed:
+            self._write([item])
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            logger.warning("interaction writer queue is full, writing %s synchronously", key)
+            self._write([item])
+
+    def get_pending(self, key: str):
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            return dict(pending[0]) if pending else None
+
+    def close(self, timeout=5):
+        '''flushes everything that is queued and stops the background thread'''
+        if self._closed:
+            return
+        self._closed = True
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("interaction writer queue is still full, giving up on flushing it")
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            pipe = self.conn.pipeline(transaction=False)
+            for key, mapping, expiration, _ in batch:
+                pipe.hset(name=key, mapping=mapping)
+                if expiration is not None:
+                    pipe.expire(key, expiration)
+            pipe.execute()
+            logger.debug("wrote %s queued writes to Redis", len(batch))
+        except Exception as e:
+            logger.error("Error writing %s queued writes to Redis: %s", len(batch), e)
+        finally:
+            with self._pending_lock:
+                for key, _, _, seq in batch:
+                    pending = self._pending.get(key)
+                    if pending is not None and pending[1] == seq:  # a later write to the same key is still queued
+                        del self._pending[key]
@@ -0,0 +1,108 @@
+'''
+This module sets up non-blocking logging for the server:
+- records are put on a queue in the request thread and formatted + written to stdout by a background listener thread
+- every record carries the request_id of the request it was logged in (see RequestIdMiddleware)
+- noisy per-section loggers are sampled (only every n:th record gets through, warnings and errors always do)
+'''
+
+import atexit
+import contextvars
+import itertools
+import logging
+import logging.handlers
+import queue
+import sys
+import uuid
+from server import settings
+
+SECTIONS_LOGGER = "server.sections"  # per-section messages (one per retrieved section)
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id = contextvars.ContextVar("request_id", default="-")
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+
+    def __init__(self, every_n: int):
+        super().__init__()
+        self.every_n = max(1, every_n)
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        return next(self._counter) % self.every_n == 0
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+
+    def prepare(self, record):
+        # the default implementation formats the message in the calling (request) thread,
+        # we leave that to the listener thread
+        return record
+
+
+def configure_logging(level=logging.INFO):
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    queue_handler = _LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())  # must run in the request thread (where the context is)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    logging.getLogger(SECTIONS_LOGGER).addFilter(SamplingFilter(settings.log_sections_sample_every_n))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    '''flushes all queued records (called on shutdown)'''
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    '''plain asgi middleware that sets (or propagates) a request id and echoes it in the X-Request-ID response header'''
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.encode())
+        rid = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex[:12]
+        token = request_id.set(rid)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER.encode(), rid.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,48 @@
+'''
+This module lets an admin profile a single request in production (without redeploying) by sending the header
+X-Profile-Token with the value of the env var PROFILING_ADMIN_TOKEN. The request is then run under cProfile and
+tracemalloc and the results are saved to PROFILING_OUTPUT_DIR (one .prof file and one .tracemalloc.txt file per request).
+'''
+
+import cProfile
+import hmac
+import logging
+import os
+import tracemalloc
+import uuid
+from datetime import datetime
+from server import settings
+
+PROFILE_HEADER = "X-Profile-Token"
+
+
+def is_requested(header_value: str) -> bool:
+    token = settings.profiling_admin_token
+    if not token or not header_value:
+        return False  # profiling is disabled unless an admin token is configured
+    return hmac.compare_digest(header_value.encode(), token.encode())
+
+
+def run_profiled(fn, *args, **kwargs):
+    os.makedirs(settings.profiling_output_dir, exist_ok=True)
+    name = f'{datetime.now().strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    base_path = os.path.join(settings.profiling_output_dir, name)
+
+    # tracemalloc is process wide, if someone else already started it we leave it running
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        profiler.dump_stats(f"{base_path}.prof")
+        with open(f"{base_path}.tracemalloc.txt", "w") as f:
+            f.write(f"current: {current} bytes, peak: {peak} bytes\n\n")
+            for stat in snapshot.statistics("lineno")[:50]:
+                f.write(f"{stat}\n")
+        logging.info(f"saved profile to {base_path}.prof and {base_path}.tracemalloc.txt")
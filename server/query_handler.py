@@ -6,12 +6,16 @@ import uuid
 from fastapi.responses import JSONResponse
 import numpy as np
 import openai
-from server import settings
+from server import settings, log_config
+from server.timing import measure
 from .semantic_cache import try_get_reply_from_cache, add_to_cache
 from .open_ai_client import call_chat_completions
 from .redis_store import RedisStore
 from util import get_embedding, num_tokens_from_string, truncate_text
 
+logger = logging.getLogger(__name__)
+section_logger = logging.getLogger(log_config.SECTIONS_LOGGER)
+
 
 def handle_query(query: str, redis_store: RedisStore, use_passive_index=False):
     interaction_id = uuid.uuid4()
@@ -26,20 +30,23 @@ def handle_query(query: str, redis_store: RedisStore, use_passive_index=False):
 
     total_tokens_allowed_for_request = total_tokens_allowed_for_req(query)
 
-    query_embedding = get_embedding(query)
+    with measure("embedding"):
+        query_embedding = get_embedding(query)
     query_vector = np.array(query_embedding).astype(np.float32).tobytes()
 
-    logging.info("Searching for similar sections...")
-    similar_sections = redis_store.search_sections(query_vector, 3, use_passive_index)
+    logger.debug("Searching for similar sections...")
+    with measure("search"):
+        similar_sections = redis_store.search_sections(query_vector, 3, use_passive_index)
     context, tokens_in_context = create_context(
         similar_sections, total_tokens_allowed_for_request)
 
     # prompt injection mitigation technique: not sending the query if it is not similar enough to the context
     min_tokens_required = 100
     if context is None or len(context) == 0 or tokens_in_context < min_tokens_required:
-        redis_store.set_interaction(
-            interaction_id, start_time, query, '', cache_reply=None, chat_completions_req_duration=0)
-        logging.info('query is not similar enough to the context')
+        with measure("redis"):
+            redis_store.set_interaction(
+                interaction_id, start_time, query, '', cache_reply=None, chat_completions_req_duration=0)
+        logger.info('query is not similar enough to the context')
         return {"interaction_id": str(interaction_id), "message": settings.get_locale()["server_texts"]["not_similar_enough_to_context"]}
 
     # prompt injection mitigation technique: having the last word..
@@ -47,35 +54,35 @@ def handle_query(query: str, redis_store: RedisStore, use_passive_index=False):
     prompt: """{settings.prompt_instructions}"""
     answer: '''
 
-    logging.info("sending a total of " + str(num_tokens_from_string(prompt,
-                                                                    "cl100k_base")) + " tokens to the API")
+    if logger.isEnabledFor(logging.DEBUG):  # tokenizing the whole prompt is not free
+        logger.debug("sending a total of %s tokens to the API", num_tokens_from_string(prompt, "cl100k_base"))
 
     chat_completions_req_start = time.time()
     catch_all_error_msg = settings.get_locale()["server_texts"]["errors"]["something_went_wrong"]
     try:
-        message = call_chat_completions(prompt)
+        with measure("llm"):
+            message = call_chat_completions(prompt)
     except openai.APIError as e:
-        logging.error(f"OpenAI API returned an API Error: {e}")
+        logger.error("OpenAI API returned an API Error: %s", e)
         return {"message": catch_all_error_msg}
     except openai.APIConnectionError as e:
-        logging.error(f"Failed to connect to OpenAI API: {e}")
+        logger.error("Failed to connect to OpenAI API: %s", e)
         return {"message": catch_all_error_msg}
     except openai.RateLimitError as e:
-        logging.error(f"OpenAI API request exceeded rate limit: {e}")
+        logger.error("OpenAI API request exceeded rate limit: %s", e)
         return {"message": catch_all_error_msg}
     except TimeoutError as e:
-        logging.error(f"OpenAI API request timed out: {e}")
+        logger.error("OpenAI API request timed out: %s", e)
         return JSONResponse(content={"message": settings.get_locale()["server_texts"]["errors"]["openai_timeout"]}, status_code=200)
     except Exception as e:
-        logging.error("unknown error", e)
+        logger.error("unknown error: %s", e)
         return {"message": catch_all_error_msg}
 
     chat_completions_req_stop = time.time()
     chat_completions_req_duration = round(
         chat_completions_req_stop - chat_completions_req_start, 0)
 
-    logging.info(
-        f'chat_completions_req_duration: {chat_completions_req_duration} seconds')
+    logger.info('chat_completions_req_duration: %s seconds', chat_completions_req_duration)
 
     read_more_headers = create_read_more_content(similar_sections)
     # if message wrapped in """ remove the """ wrapping
@@ -90,8 +97,9 @@ def handle_query(query: str, redis_store: RedisStore, use_passive_index=False):
         "embeddings_version": embeddings_version
     }
 
-    redis_store.set_interaction(interaction_id, start_time, query,
-                                str(reply["message"]), None, chat_completions_req_duration)
+    with measure("redis"):
+        redis_store.set_interaction(interaction_id, start_time, query,
+                                    str(reply["message"]), None, chat_completions_req_duration)
 
     try_add_to_semantic_cache(query, redis_store, reply)
 
@@ -116,26 +124,23 @@ def create_context(similar_sections, total_tokens_allowed_for_request) -> Tuple[
     context = ''
     tokens_in_context = 0
     if similar_sections:
-        logging.info(f"Found {similar_sections.total} similar sections:")
+        section_logger.info("Found %s similar sections:", similar_sections.total)
         for i, section in enumerate(similar_sections.docs):
             score = 1 - float(section.vector_score)
             min_score = settings.sections_min_similarity_score
             if score < min_score:
-                logging.info(
-                    f'ignoring section {section.header} with score {score} (lower than {min_score})')
+                section_logger.info('ignoring section %s with score %s (lower than %s)', section.header, score, min_score)
                 continue
             context += section.body  # add this section to the context
             tokens_in_context += float(section.num_of_tokens)
-            logging.info(
-                f'adding section {section.header} with score {score} (higher than {min_score})')
+            section_logger.info('adding section %s with score %s (higher than %s)', section.header, score, min_score)
             if tokens_in_context > total_tokens_allowed_for_request:
-                logging.info(
-                    f'context is too long: {tokens_in_context} truncating to {total_tokens_allowed_for_request}')
+                logger.info('context is too long: %s truncating to %s', tokens_in_context, total_tokens_allowed_for_request)
                 # truncate the context
                 context = truncate_text(
                     context, total_tokens_allowed_for_request)
                 tokens_in_context = total_tokens_allowed_for_request
-                logging.info(f'context is now {tokens_in_context} tokens long')
+                logger.info('context is now %s tokens long', tokens_in_context)
                 break
 
     return context, tokens_in_context
@@ -157,8 +162,8 @@ def validate(query: str) -> Tuple[bool, str]:
         return False, settings.get_locale()["server_texts"]["validation"]["min_length"]
 
     if len(query) > 80:
-        logging.info(f'query is too long (max 80 characters): {len(query)}')
-        logging.info(query)
+        logger.info('query is too long (max 80 characters): %s', len(query))
+        logger.debug('query: %s', query)
         return False, settings.get_locale()["server_texts"]["validation"]["max_length"]
 
     return True, ""
@@ -166,10 +171,10 @@ def validate(query: str) -> Tuple[bool, str]:
 
 def try_semantic_cache(query: str, redis_store: RedisStore, interaction_id, start_time):
     if settings.semantic_cache_enabled:
-        logging.info("semantic cache enabled, checking cache...")
+        logger.debug("semantic cache enabled, checking cache...")
         hit = try_get_reply_from_cache(query, redis_store)
         if hit is not None:
-            logging.info(f"Found reply in cache for query {query}")
+            logger.debug("Found reply in cache for query %s", query)
             cache_reply = {
                 "message": hit["reply"],
                 "interaction_id": str(interaction_id),
@@ -177,10 +182,11 @@ def try_semantic_cache(query: str, redis_store: RedisStore, interaction_id, star
                 "sectionHeaders": json.loads(hit["section_headers_as_json"]),
                 "original_query": hit["original_query"],
             }
-            redis_store.set_interaction(interaction_id, start_time, query, '', {"cached_reply": hit["reply"], "original_query": hit["original_query"]}, 0)
+            with measure("redis"):
+                redis_store.set_interaction(interaction_id, start_time, query, '', {"cached_reply": hit["reply"], "original_query": hit["original_query"]}, 0)
             return cache_reply
     else:
-        logging.info("semantic cache disabled, continuing..")
+        logger.debug("semantic cache disabled, continuing..")
         return None
 
 
@@ -195,6 +201,6 @@ def total_tokens_allowed_for_req(query: str) -> int:
 def try_add_to_semantic_cache(query: str, redis_store: RedisStore, reply):
     if settings.semantic_cache_enabled:
         section_headers_as_json = json.dumps(reply["sectionHeaders"])
-        logging.info("semantic cache enabled, adding reply to cache...")
+        logger.debug("semantic cache enabled, adding reply to cache...")
         add_to_cache(query, str(reply["message"]),
                      section_headers_as_json, redis_store)
@@ -6,6 +6,9 @@ from redis.commands.search.field import VectorField, TextField, NumericField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from redis.commands.search.query import Query
 from server import settings
+from .interaction_writer import InteractionWriter
+
+logger = logging.getLogger(__name__)
 
 
 class RedisStore:
@@ -42,16 +45,27 @@ class RedisStore:
     redis_port = settings.redis_port
     redis_password = settings.redis_password
 
-    def __init__(self):
+    def __init__(self, write_behind=False):
         self.conn = self._connect_redis()
+        self.writer = None
+        if write_behind:
+            # interactions and semantic cache entries are written by a background thread (see interaction_writer.py)
+            self.writer = InteractionWriter(self.conn,
+                                            batch_size=settings.write_behind_batch_size,
+                                            flush_interval_ms=settings.write_behind_flush_interval_ms,
+                                            queue_size=settings.write_behind_queue_size)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
 
     def _ensure_semantic_cache_search_index(self, conn: redis.Redis):
         try:
             conn.ft(self.SEMANTIC_CACHE_INDEX).create_index(fields=self.SEMANTIC_CACHE_SCHEMA, definition=IndexDefinition(
                 prefix=[self.SEMANTIC_CACHE_PREFIX], index_type=IndexType.HASH))
-            logging.info("Created semantic_cache index")
+            logger.info("Created semantic_cache index")
         except Exception as e:
-            logging.info(e)
+            logger.info(e)
             pass
 
     def _ensure_interaction_feedback_search_index(self, conn: redis.Redis):
@@ -59,18 +73,18 @@ class RedisStore:
             conn.ft(self.INTERACTION_INDEX).create_index(
                 self.INTERACTION_SCHEMA, definition=IndexDefinition(prefix=[self.INTERACTION_PREFIX],
                                                                     index_type=IndexType.HASH))
-            logging.info("Created interaction index")
+            logger.info("Created interaction index")
         except Exception as e:
-            logging.info(e)
+            logger.info(e)
             pass  # assume the index already exists
 
     def _ensure_section_index(self, section_idx, conn: redis.Redis):
         prefix = f"{section_idx}:"
         try:
             conn.ft(section_idx).create_index(fields=self.SECTION_SCHEMA, definition=IndexDefinition(prefix=[prefix], index_type=IndexType.HASH))
-            logging.info(f"Created section index {section_idx} with prefix {prefix}")
+            logger.info("Created section index %s with prefix %s", section_idx, prefix)
         except Exception as e:
-            logging.info(e)
+            logger.info(e)
         pass  # assume the index already exists
 
     def _connect_redis(self, retries=5, delay=5):
@@ -79,7 +93,7 @@ class RedisStore:
                 conn = redis.Redis(host=self.redis_host, port=self.redis_port,
                                    password=self.redis_password, encoding='utf-8', decode_responses=True)
                 if conn.ping():
-                    logging.info("Connected to Redis")
+                    logger.info("Connected to Redis")
                     self._ensure_interaction_feedback_search_index(conn)
                     self._ensure_semantic_cache_search_index(conn)
                     self._ensure_section_index(self.SECTION_BLUE, conn)
@@ -87,15 +101,14 @@ class RedisStore:
                     # ensure the active section index is set
                     active_section_index = conn.get('active_section_index')
                     if active_section_index is None or active_section_index == "":
-                        logging.info(f"active_section_index not set, setting to {self.SECTION_BLUE}")
+                        logger.info("active_section_index not set, setting to %s", self.SECTION_BLUE)
                         active_section_index = self.SECTION_BLUE
                         conn.set('active_section_index', active_section_index)
                     return conn
             except redis.ConnectionError as e:
                 if i < retries - 1:
-                    logging.error(e)
-                    logging.info(
-                        f'Retry {i + 1}/{retries} failed, retrying in {delay} seconds')
+                    logger.error(e)
+                    logger.info('Retry %s/%s failed, retrying in %s seconds', i + 1, retries, delay)
                     time.sleep(delay)
                     continue
                 else:
@@ -103,11 +116,11 @@ class RedisStore:
 
     def set_embeddings_version(self, date_and_time: datetime):
         dt = date_and_time.strftime("%Y-%m-%d")
-        logging.info(f'setting embeddings_version to {dt}')
+        logger.info('setting embeddings_version to %s', dt)
         try:
             self.conn.set('embeddings_version', dt)
         except Exception as e:
-            logging.error("Error setting embeddings version in Redis: ", e)
+            logger.error("Error setting embeddings version in Redis: %s", e)
             raise
 
     def get_embeddings_version(self) -> datetime:
@@ -115,7 +128,7 @@ class RedisStore:
             version = self.conn.get('embeddings_version')
             return version
         except Exception as e:
-            logging.error("Error getting embeddings version from Redis: ", e)
+            logger.error("Error getting embeddings version from Redis: %s", e)
             return None
 
     def get_active_section_index(self) -> str:
@@ -131,22 +144,22 @@ class RedisStore:
 
     def set_active_section_index(self, section_idx: str):
         try:
-            logging.info(f'setting active_section_index to {section_idx}')
+            logger.info('setting active_section_index to %s', section_idx)
             self.conn.set('active_section_index', section_idx)
         except Exception as e:
-            logging.error("Error setting active_section_index in Redis: ", e)
+            logger.error("Error setting active_section_index in Redis: %s", e)
             raise
 
     def delete_all_sections(self, section_idx):
         prefix = f"{section_idx}:*"
         try:
-            logging.info(f'deleting all sections in index {section_idx}')
+            logger.info('deleting all sections in index %s', section_idx)
             keys = self.conn.keys(prefix)
-            logging.info(f'deleting {len(keys)}')
+            logger.info('deleting %s', len(keys))
             if keys is not None and len(keys) != 0:
                 self.conn.delete(*keys)
         except Exception as e:
-            logging.error("Error deleting all sections from Redis: ", e)
+            logger.error("Error deleting all sections from Redis: %s", e)
             raise
 
     def set_interaction(self, interaction_id: any, start_time: float, query: str, reply: str, cache_reply: dict, chat_completions_req_duration: float,
@@ -171,35 +184,44 @@ class RedisStore:
                 interaction[key] = value
 
         key = f'{self.INTERACTION_PREFIX}{interaction_id}'
+        if self.writer is not None:
+            self.writer.submit(key, interaction, expiration)
+            return
         try:
-            logging.info(
-                f'Saving interaction to Redis with id {interaction_id}')
+            logger.debug('Saving interaction to Redis with id %s', interaction_id)
             self.conn.hset(name=key, mapping=interaction)
             # save for (default=4) days (nightly datapump-cron-job gets 4 chances to copy to statsdb)
             # while still keeping the in-memory redis small
             self.conn.expire(key, expiration)
         except Exception as e:
-            logging.error("Error saving interaction to Redis: ", e)
+            logger.error("Error saving interaction to Redis: %s", e)
             return None
 
     def update_interaction(self, interaction: any, interaction_id: str):
         key = f'{self.INTERACTION_PREFIX}{interaction_id}'
+        if self.writer is not None:
+            # queued behind the set_interaction of the same key (if it is still pending)
+            self.writer.submit(key, interaction)
+            return
         try:
-            logging.info(
-                f'Updating interaction in Redis with id {interaction_id}')
+            logger.debug('Updating interaction in Redis with id %s', interaction_id)
             self.conn.hset(name=key, mapping=interaction)
         except Exception as e:
-            logging.error("Error updating interaction in Redis: ", e)
+            logger.error("Error updating interaction in Redis: %s", e)
             return None
 
     def get_interaction(self, interaction_id: str):
+        if self.writer is not None:
+            pending = self.writer.get_pending(f'{self.INTERACTION_PREFIX}{interaction_id}')
+            if pending is not None:
+                return pending
         try:
-            logging.info('searching for ' + f'{self.INTERACTION_PREFIX}{interaction_id}')
+            logger.debug('searching for %s%s', self.INTERACTION_PREFIX, interaction_id)
             interaction = self.conn.hgetall(
                 f'{self.INTERACTION_PREFIX}{interaction_id}')
             return interaction
         except Exception as e:
-            logging.error("Error getting interaction from Redis: ", e)
+            logger.error("Error getting interaction from Redis: %s", e)
             return None
 
     def get_all_interactions_with_keys(self) -> dict:
@@ -212,7 +234,7 @@ class RedisStore:
             return key_interacton_dict
 
         except Exception as e:
-            logging.error("Error getting all interactions from Redis: ", e)
+            logger.error("Error getting all interactions from Redis: %s", e)
             return None
 
     def search_semantic_cache(self, query_vector, top_k=1):
@@ -222,14 +244,13 @@ class RedisStore:
             results = self.conn.ft(self.SEMANTIC_CACHE_INDEX).search(query, query_params={"vector": query_vector})
             return results
         except Exception as e:
-            logging.error("Error searching semantic cache in Redis: ", e)
+            logger.error("Error searching semantic cache in Redis: %s", e)
             return None
 
     def add_to_semantic_cache(self, query: str, reply: str, section_headers_as_json: str, query_embedding: bytes, expiration=timedelta(minutes=90)):
         key = f"semantic_cache:{query}"
         try:
-            logging.info(
-                f'Saving key {key} to cache')
+            logger.debug('Saving key %s to cache', key)
 
             cache_entry_hash = {
                 "query": query,
@@ -237,11 +258,14 @@ class RedisStore:
                 "section_headers_as_json": section_headers_as_json,
                 "embedding": query_embedding
             }
+            if self.writer is not None:
+                self.writer.submit(key, cache_entry_hash, expiration, remember=False)
+                return
             self.conn.hset(name=key, mapping=cache_entry_hash)
             self.conn.expire(key, expiration)
 
         except Exception as e:
-            logging.error("Error saving semantic cache entry to Redis: ", e)
+            logger.error("Error saving semantic cache entry to Redis: %s", e)
             return None
 
     def delete_all_semantic_cache_entries(self):
@@ -250,16 +274,16 @@ class RedisStore:
             if keys is not None and len(keys) != 0:
                 self.conn.delete(*keys)
         except Exception as e:
-            logging.error("Error deleting semantic cache entries from Redis: ", e)
+            logger.error("Error deleting semantic cache entries from Redis: %s", e)
             return None
 
     def search_sections(self, query_vector, top_k=5, use_passive_index=False):
         section_index = self.get_active_section_index()
         if use_passive_index:
-            logging.info("using passive index!")
+            logger.info("using passive index!")
             section_index = self.get_passive_section_index()
 
-        logging.info(f"searching in active_section_index {section_index}")
+        logger.debug("searching in active_section_index %s", section_index)
         base_query = f"*=>[KNN {top_k} @embedding $vector AS vector_score]"
         query = Query(base_query).return_fields("header", "body", "anchor_url",
                                                 "num_of_tokens", "vector_score").sort_by("vector_score").dialect(2)
@@ -267,7 +291,7 @@ class RedisStore:
             results = self.conn.ft(section_index).search(
                 query, query_params={"vector": query_vector})
         except Exception as e:
-            logging.info("Error calling Redis search: ", e)
+            logger.error("Error calling Redis search: %s", e)
             return None
 
         return results
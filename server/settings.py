@@ -53,6 +53,34 @@ sections_min_similarity_score_default_value = 0.8
 sections_min_similarity_score = os.getenv('SECTIONS_MIN_SIMILARITY_SCORE')
 sections_min_similarity_score = sections_min_similarity_score_default_value if sections_min_similarity_score is None else float(sections_min_similarity_score)
 
+# profiling of single requests is only possible when an admin token is set (see server/profiling.py)
+profiling_admin_token = os.getenv('PROFILING_ADMIN_TOKEN')
+profiling_output_dir_default_value = '/tmp/profiles'
+profiling_output_dir = os.getenv('PROFILING_OUTPUT_DIR')
+profiling_output_dir = profiling_output_dir_default_value if profiling_output_dir is None else profiling_output_dir
+
+# only every n:th per-section log record is written (see server/log_config.py)
+log_sections_sample_every_n_default_value = 10
+log_sections_sample_every_n = os.getenv('LOG_SECTIONS_SAMPLE_EVERY_N')
+log_sections_sample_every_n = log_sections_sample_every_n_default_value if log_sections_sample_every_n is None else int(log_sections_sample_every_n)
+
+# interactions and semantic cache entries are written to redis by a background thread (see server/interaction_writer.py)
+write_behind_enabled_default_value = True
+write_behind_enabled = os.getenv('WRITE_BEHIND_ENABLED')
+write_behind_enabled = write_behind_enabled_default_value if write_behind_enabled is None else write_behind_enabled.lower() == 'true'
+
+write_behind_batch_size_default_value = 50
+write_behind_batch_size = os.getenv('WRITE_BEHIND_BATCH_SIZE')
+write_behind_batch_size = write_behind_batch_size_default_value if write_behind_batch_size is None else int(write_behind_batch_size)
+
+write_behind_flush_interval_ms_default_value = 5
+write_behind_flush_interval_ms = os.getenv('WRITE_BEHIND_FLUSH_INTERVAL_MS')
+write_behind_flush_interval_ms = write_behind_flush_interval_ms_default_value if write_behind_flush_interval_ms is None else float(write_behind_flush_interval_ms)
+
+write_behind_queue_size_default_value = 10000
+write_behind_queue_size = os.getenv('WRITE_BEHIND_QUEUE_SIZE')
+write_behind_queue_size = write_behind_queue_size_default_value if write_behind_queue_size is None else int(write_behind_queue_size)
+
 openai_api_key = os.environ.get("OPENAI_API_KEY")
 if not openai_api_key:
     print("Warning: OPENAI_API_KEY not set, using dummy value for tests")
@@ -81,3 +109,10 @@ def print_settings_with_defaults():
     logging.info(f'semantic_cache_min_similarity_score is set to {semantic_cache_min_similarity_score} (default: {semantic_cache_min_similarity_score_default_value})')
     logging.info(f'sections_min_similarity_score is set to {sections_min_similarity_score} (default: {sections_min_similarity_score_default_value})')
     logging.info(f'lang is set to {lang} (default: {lang_default})')
+    logging.info(f'log_sections_sample_every_n is set to {log_sections_sample_every_n} (default: {log_sections_sample_every_n_default_value})')
+    logging.info(f'write_behind_enabled is set to {write_behind_enabled} (default: {write_behind_enabled_default_value})')
+    logging.info(f'write_behind_batch_size is set to {write_behind_batch_size} (default: {write_behind_batch_size_default_value})')
+    logging.info(f'write_behind_flush_interval_ms is set to {write_behind_flush_interval_ms} (default: {write_behind_flush_interval_ms_default_value})')
+    logging.info(f'write_behind_queue_size is set to {write_behind_queue_size} (default: {write_behind_queue_size_default_value})')
+    logging.info(f'request profiling is {"enabled" if profiling_admin_token else "disabled"} (set PROFILING_ADMIN_TOKEN to enable)')
+    logging.info(f'profiling_output_dir is set to {profiling_output_dir} (default: {profiling_output_dir_default_value})')
@@ -0,0 +1,58 @@
+'''
+This module collects per-request timings (embedding, search, llm, redis..) and renders them as a Server-Timing header
+so that browser devtools and synthetic probes can see where the time of a /qa request goes.
+'''
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current_timing = contextvars.ContextVar("server_timing", default=None)
+
+
+class ServerTiming:
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = {}  # name -> milliseconds (insertion ordered)
+
+    def add(self, name: str, duration_ms: float):
+        self.durations[name] = self.durations.get(name, 0.0) + duration_ms
+
+    def header_value(self) -> str:
+        total_ms = (time.perf_counter() - self.start) * 1000
+        metrics = [f"{name};dur={duration_ms:.1f}" for name, duration_ms in self.durations.items()]
+        metrics.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(metrics)
+
+
+@contextmanager
+def request_timing():
+    '''collects all measure(..) calls made (in this context) until the block exits'''
+    server_timing = ServerTiming()
+    token = _current_timing.set(server_timing)
+    try:
+        yield server_timing
+    finally:
+        _current_timing.reset(token)
+
+
+@contextmanager
+def measure(name: str):
+    '''times the block and adds it to the current request (no-op outside of request_timing())'''
+    server_timing = _current_timing.get()
+    if server_timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        server_timing.add(name, (time.perf_counter() - start) * 1000)
+
+
+def attach_header(result, response, server_timing: ServerTiming):
+    '''handle_query returns either a dict (rendered by fastapi using response) or a Response of its own'''
+    target = result if hasattr(result, "headers") else response
+    target.headers["Server-Timing"] = server_timing.header_value()
+    return result
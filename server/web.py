@@ -1,24 +1,30 @@
 from dotenv import load_dotenv
 load_dotenv()  # this needs to be before some other imports
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import FileResponse
 from pathlib import Path
 from pydantic import BaseModel
-import logging
-from server import settings
+from server import settings, timing, profiling, log_config
 from .redis_store import RedisStore
 from .feedback_handler import handle_feedback
 from .query_handler import handle_query
 
-logging.basicConfig(level=logging.INFO)
+log_config.configure_logging()
 settings.check_required()   # .. or fail early!
 settings.print_settings_with_defaults()
-redis_store = RedisStore()
+redis_store = RedisStore(write_behind=settings.write_behind_enabled)
 app = FastAPI()
+app.add_middleware(log_config.RequestIdMiddleware)
 
 static_folder = Path(__file__).parent / "static"
 
 
+@app.on_event("shutdown")
+def shutdown():
+    redis_store.close()  # flush queued interactions before we stop logging
+    log_config.stop_logging()
+
+
 @app.get("/")
 async def root():
     return FileResponse(static_folder / "index.html")
@@ -49,8 +55,13 @@ class QAPayload(BaseModel):
 
 
 @app.post("/qa", status_code=200)
-async def qa(payload: QAPayload):
-    return handle_query(payload.query, redis_store)
+async def qa(payload: QAPayload, request: Request, response: Response):
+    with timing.request_timing() as server_timing:
+        if profiling.is_requested(request.headers.get(profiling.PROFILE_HEADER)):
+            result = profiling.run_profiled(handle_query, payload.query, redis_store)
+        else:
+            result = handle_query(payload.query, redis_store)
+    return timing.attach_header(result, response, server_timing)
 
 
 class FeedbackPayload(BaseModel):
@@ -0,0 +1,56 @@
+import queue
+from unittest.mock import Mock
+from server.interaction_writer import InteractionWriter
+from tests.base_test import BaseTest
+
+
+class TestInteractionWriter(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.mock_conn = Mock()
+        self.mock_pipe = Mock()
+        self.mock_conn.pipeline.return_value = self.mock_pipe
+
+    def test_close_flushes_queued_writes_in_one_pipeline(self):
+        writer = InteractionWriter(self.mock_conn, batch_size=10, flush_interval_ms=1000)
+        writer.submit("interaction:1", {"query": "q1"}, expiration=60)
+        writer.submit("interaction:2", {"query": "q2"}, expiration=60)
+        writer.close()
+
+        self.mock_pipe.hset.assert_any_call(name="interaction:1", mapping={"query": "q1"})
+        self.mock_pipe.hset.assert_any_call(name="interaction:2", mapping={"query": "q2"})
+        self.assertEqual(self.mock_pipe.expire.call_count, 2)
+        self.mock_pipe.execute.assert_called_once()
+
+    def test_pending_interaction_is_readable_until_written(self):
+        writer = InteractionWriter(self.mock_conn, batch_size=10, flush_interval_ms=1000)
+        writer.submit("interaction:1", {"query": "q1", "feedback": "not given"}, expiration=60)
+        writer.submit("interaction:1", {"feedback": "thumbsup"})
+
+        self.assertEqual(writer.get_pending("interaction:1"), {"query": "q1", "feedback": "thumbsup"})
+        writer.close()
+        self.assertIsNone(writer.get_pending("interaction:1"))
+
+    def test_cache_entries_are_not_kept_as_pending(self):
+        writer = InteractionWriter(self.mock_conn, batch_size=10, flush_interval_ms=1000)
+        writer.submit("semantic_cache:q", {"query": "q"}, expiration=60, remember=False)
+        self.assertIsNone(writer.get_pending("semantic_cache:q"))
+        writer.close()
+
+    def test_full_queue_falls_back_to_synchronous_write(self):
+        writer = InteractionWriter(self.mock_conn, batch_size=10, flush_interval_ms=1000)
+        writer.close()  # stop the background thread, then pretend the queue is full
+        writer._closed = False
+        writer._queue = Mock(put_nowait=Mock(side_effect=queue.Full))
+
+        writer.submit("interaction:1", {"query": "q1"})
+
+        self.mock_pipe.hset.assert_called_with(name="interaction:1", mapping={"query": "q1"})
+        self.mock_pipe.execute.assert_called()
+
+    def test_write_after_close_is_synchronous(self):
+        writer = InteractionWriter(self.mock_conn)
+        writer.close()
+        writer.submit("interaction:1", {"query": "q1"}, expiration=60)
+        self.mock_pipe.hset.assert_called_with(name="interaction:1", mapping={"query": "q1"})
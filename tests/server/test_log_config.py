@@ -0,0 +1,34 @@
+import logging
+from server import log_config
+from tests.base_test import BaseTest
+
+
+class TestLogConfig(BaseTest):
+
+    def _record(self, level=logging.INFO):
+        return logging.LogRecord("server.sections", level, __file__, 1, "adding section %s", ("a",), None)
+
+    def test_sampling_filter_lets_every_nth_record_through(self):
+        sampling_filter = log_config.SamplingFilter(every_n=3)
+        passed = [sampling_filter.filter(self._record()) for _ in range(6)]
+        self.assertEqual(passed, [True, False, False, True, False, False])
+
+    def test_sampling_filter_never_drops_warnings(self):
+        sampling_filter = log_config.SamplingFilter(every_n=100)
+        sampling_filter.filter(self._record())
+        self.assertTrue(sampling_filter.filter(self._record(logging.WARNING)))
+        self.assertTrue(sampling_filter.filter(self._record(logging.ERROR)))
+
+    def test_request_id_filter_adds_request_id_from_context(self):
+        record = self._record()
+        token = log_config.request_id.set("abc123")
+        try:
+            log_config.RequestIdFilter().filter(record)
+        finally:
+            log_config.request_id.reset(token)
+        self.assertEqual(record.request_id, "abc123")
+
+    def test_request_id_defaults_to_dash_outside_requests(self):
+        record = self._record()
+        log_config.RequestIdFilter().filter(record)
+        self.assertEqual(record.request_id, "-")
@@ -0,0 +1,54 @@
+from unittest.mock import Mock, patch
+from fastapi.responses import JSONResponse
+from server import timing, profiling
+from tests.base_test import BaseTest
+
+
+class TestServerTiming(BaseTest):
+
+    def test_measure_accumulates_per_name(self):
+        with timing.request_timing() as server_timing:
+            with timing.measure("embedding"):
+                pass
+            with timing.measure("embedding"):
+                pass
+            with timing.measure("llm"):
+                pass
+
+        self.assertEqual(list(server_timing.durations.keys()), ["embedding", "llm"])
+        header = server_timing.header_value()
+        self.assertTrue(header.startswith("embedding;dur="))
+        self.assertIn(", llm;dur=", header)
+        self.assertIn(", total;dur=", header)
+
+    def test_measure_outside_request_is_a_noop(self):
+        with timing.measure("embedding"):
+            pass  # should not raise
+
+    def test_attach_header_to_dict_result_uses_response(self):
+        response = Mock(headers={})
+        with timing.request_timing() as server_timing:
+            result = timing.attach_header({"message": "hi"}, response, server_timing)
+        self.assertEqual(result, {"message": "hi"})
+        self.assertIn("Server-Timing", response.headers)
+
+    def test_attach_header_to_json_response(self):
+        result = JSONResponse(content={"message": "bad"}, status_code=400)
+        with timing.request_timing() as server_timing:
+            timing.attach_header(result, Mock(headers={}), server_timing)
+        self.assertIn("total;dur=", result.headers["Server-Timing"])
+
+
+class TestProfiling(BaseTest):
+
+    @patch('server.profiling.settings')
+    def test_profiling_disabled_without_admin_token(self, mock_settings):
+        mock_settings.configure_mock(profiling_admin_token=None)
+        self.assertFalse(profiling.is_requested("anything"))
+
+    @patch('server.profiling.settings')
+    def test_profiling_requires_matching_token(self, mock_settings):
+        mock_settings.configure_mock(profiling_admin_token="secret")
+        self.assertFalse(profiling.is_requested("wrong"))
+        self.assertFalse(profiling.is_requested(None))
+        self.assertTrue(profiling.is_requested("secret"))